@@ -1,9 +1,15 @@
 import datetime as dt
-from typing import Tuple
+import os
+import threading
+import time
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict
 
 import altair as alt
 import pandas as pd
 import streamlit as st
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
 
 from data_sources import (
     DataFetchError,
@@ -32,50 +38,196 @@ st.markdown(
 )
 
 
-@st.cache_data(ttl=3600)
+MVRV_START = dt.date(2013, 1, 1)
+
+# Slow-moving sources are persisted to disk so a restarted worker does not
+# refetch them. Each source owns exactly one pickle that is overwritten on
+# refresh, so disk usage stays bounded (Streamlit's ``persist="disk"`` ignores
+# ``ttl`` and never deletes evicted entries).
+_DISK_CACHE_DIR = Path.home() / ".streamlit" / "dashboard_cache"
+
+_PERSISTED_FETCHERS: Dict[str, Callable[[], pd.DataFrame]] = {
+    "global_m2": fetch_global_m2,
+    "mvrv": lambda: fetch_mvrv_timeseries(MVRV_START),
+    "ahr": fetch_ahr_timeseries,
+    "btc_treasuries": lambda: fetch_btc_treasury_holdings(15),
+    "eth_treasuries": lambda: fetch_eth_treasury_holdings(15),
+    "sol_treasuries": lambda: fetch_sol_treasury_holdings(15),
+}
+
+
+def _load_persisted(name: str, max_age: int) -> pd.DataFrame:
+    path = _DISK_CACHE_DIR / f"{name}.pkl"
+    try:
+        fresh = time.time() - path.stat().st_mtime < max_age
+    except OSError:
+        fresh = False
+    if fresh:
+        try:
+            return pd.read_pickle(path)
+        except Exception:
+            # Corrupt, or written by an incompatible pandas/numpy: refetch.
+            path.unlink(missing_ok=True)
+    df = _PERSISTED_FETCHERS[name]()
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        _DISK_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        df.to_pickle(tmp_path)
+        os.replace(tmp_path, path)
+    except OSError:
+        tmp_path.unlink(missing_ok=True)
+    return df
+
+
+_DAY = 24 * 3600
+_SIX_HOURS = 6 * 3600
+# The disk file carries the real refresh schedule; the in-memory copy is only
+# kept briefly so a frame read back from an old file is not held for a full day.
+_MEMORY_TTL = 900
+
+
+@st.cache_data(ttl=_MEMORY_TTL, max_entries=1, show_spinner=False)
 def load_global_m2() -> pd.DataFrame:
-    return fetch_global_m2()
+    return _load_persisted("global_m2", _DAY)
 
 
-@st.cache_data(ttl=1800)
+@st.cache_data(ttl=1800, max_entries=4, show_spinner=False)
 def load_market_caps() -> MarketCapSnapshot:
     return fetch_market_caps()
 
 
-@st.cache_data(ttl=1800)
+@st.cache_data(ttl=_MEMORY_TTL, max_entries=1, show_spinner=False)
 def load_mvrv() -> pd.DataFrame:
-    start = dt.date(2013, 1, 1)
-    return fetch_mvrv_timeseries(start)
+    return _load_persisted("mvrv", _SIX_HOURS)
 
 
-@st.cache_data(ttl=1800)
+@st.cache_data(ttl=_MEMORY_TTL, max_entries=1, show_spinner=False)
 def load_ahr() -> pd.DataFrame:
-    return fetch_ahr_timeseries()
+    return _load_persisted("ahr", _SIX_HOURS)
 
 
-@st.cache_data(ttl=900)
+@st.cache_data(ttl=900, max_entries=4, show_spinner=False)
 def load_btc_etf_flows() -> pd.DataFrame:
     return fetch_btc_etf_flows()
 
 
-@st.cache_data(ttl=900)
+@st.cache_data(ttl=900, max_entries=4, show_spinner=False)
 def load_eth_etf_flows() -> pd.DataFrame:
     return fetch_eth_etf_flows()
 
 
-@st.cache_data(ttl=3600)
+@st.cache_data(ttl=_MEMORY_TTL, max_entries=1, show_spinner=False)
 def load_btc_treasuries() -> pd.DataFrame:
-    return fetch_btc_treasury_holdings(15)
+    return _load_persisted("btc_treasuries", _DAY)
 
 
-@st.cache_data(ttl=3600)
+@st.cache_data(ttl=_MEMORY_TTL, max_entries=1, show_spinner=False)
 def load_eth_treasuries() -> pd.DataFrame:
-    return fetch_eth_treasury_holdings(15)
+    return _load_persisted("eth_treasuries", _DAY)
 
 
-@st.cache_data(ttl=3600)
+@st.cache_data(ttl=_MEMORY_TTL, max_entries=1, show_spinner=False)
 def load_sol_treasuries() -> pd.DataFrame:
-    return fetch_sol_treasury_holdings(15)
+    return _load_persisted("sol_treasuries", _DAY)
+
+
+_LOADERS = (
+    load_global_m2,
+    load_market_caps,
+    load_mvrv,
+    load_ahr,
+    load_btc_etf_flows,
+    load_eth_etf_flows,
+    load_btc_treasuries,
+    load_eth_treasuries,
+    load_sol_treasuries,
+)
+
+
+@st.cache_resource(ttl=900, max_entries=1)
+def prefetch_all() -> None:
+    """Warm every loader's cache concurrently.
+
+    Failures are ignored here; they surface again when the matching
+    ``render_*`` section calls its loader.
+    """
+    ctx = get_script_run_ctx()
+
+    def run(load: Callable[[], object]) -> None:
+        add_script_run_ctx(threading.current_thread(), ctx)
+        try:
+            load()
+        except Exception:
+            pass
+
+    with ThreadPoolExecutor(max_workers=10) as executor:
+        for load in _LOADERS:
+            executor.submit(run, load)
+
+
+def _data_free_spec(chart: alt.Chart) -> dict:
+    """Serialise ``chart`` once, leaving the data to be supplied at render time."""
+    spec = chart.to_dict()
+    spec.pop("data", None)
+    spec.pop("datasets", None)
+    return spec
+
+
+# Chart specs do not depend on the data, so they are built (and validated by
+# Altair) once and rendered through st.vega_lite_chart on every rerun.
+@st.cache_data(max_entries=4, show_spinner=False)
+def build_m2_spec() -> dict:
+    return _data_free_spec(
+        alt.Chart()
+        .mark_line(point=False)
+        .encode(x="year:O", y=alt.Y("value_trillion:Q", title="Broad Money (万亿美元)"))
+        .properties(height=380)
+    )
+
+
+@st.cache_data(max_entries=4, show_spinner=False)
+def build_mvrv_spec() -> dict:
+    return _data_free_spec(
+        alt.Chart()
+        .mark_line()
+        .encode(x="date:T", y=alt.Y("mvrv_ratio:Q", title="MVRV Ratio"))
+        .properties(height=320)
+    )
+
+
+_AHR_LOWER_RULE_SPEC = {
+    "data": {"values": [{"value": 0.45}]},
+    "mark": {"type": "rule", "color": "#2ab57d", "strokeDash": [4, 4]},
+    "encoding": {"y": {"field": "value", "type": "quantitative"}},
+}
+_AHR_UPPER_RULE_SPEC = {
+    "data": {"values": [{"value": 1.2}]},
+    "mark": {"type": "rule", "color": "#5156be", "strokeDash": [4, 4]},
+    "encoding": {"y": {"field": "value", "type": "quantitative"}},
+}
+
+
+@st.cache_data(max_entries=4, show_spinner=False)
+def build_ahr_spec() -> dict:
+    spec = _data_free_spec(
+        alt.Chart()
+        .mark_line(color="#fd625e")
+        .encode(x="date:T", y="ahr:Q")
+        .properties(height=320)
+    )
+    line = {"mark": spec.pop("mark"), "encoding": spec.pop("encoding")}
+    spec["layer"] = [line, _AHR_LOWER_RULE_SPEC, _AHR_UPPER_RULE_SPEC]
+    return spec
+
+
+@st.cache_data(max_entries=4, show_spinner=False)
+def build_etf_flow_spec(color: str) -> dict:
+    return _data_free_spec(
+        alt.Chart()
+        .mark_bar(color=color)
+        .encode(x="date:T", y=alt.Y("total_flow:Q", title="净流入 (百万美元)"))
+        .properties(height=320)
+    )
 
 
 def render_global_m2():
@@ -86,25 +238,20 @@ def render_global_m2():
         st.error(f"无法获取世界银行数据：{exc}")
         return
 
-    chart = (
-        alt.Chart(df)
-        .mark_line(point=False)
-        .encode(x="year:O", y=alt.Y("value_trillion", title="Broad Money (万亿美元)"))
-        .properties(height=380)
-    )
-    st.altair_chart(chart, use_container_width=True)
+    st.vega_lite_chart(df, build_m2_spec(), use_container_width=True)
     st.caption("数据来源：World Bank（指标 FM.LBL.BMNY.CN，单位为当前币值的广义货币）")
 
 
+_SCALES = ((1e12, "万亿"), (1e9, "十亿"), (1e6, "百万"))
+
+
 def _format_number(value: float) -> str:
     if pd.isna(value):
         return "-"
-    if abs(value) >= 1e12:
-        return f"{value / 1e12:.2f} 万亿"
-    if abs(value) >= 1e9:
-        return f"{value / 1e9:.2f} 十亿"
-    if abs(value) >= 1e6:
-        return f"{value / 1e6:.2f} 百万"
+    magnitude = abs(value)
+    for threshold, label in _SCALES:
+        if magnitude >= threshold:
+            return f"{value / threshold:.2f} {label}"
     return f"{value:,.0f}"
 
 
@@ -138,16 +285,12 @@ def render_btc_valuations():
         except DataFetchError as exc:
             st.error(f"无法获取 CoinMetrics 数据：{exc}")
         else:
-            mvrv_chart = (
-                alt.Chart(mvrv)
-                .mark_line()
-                .encode(x="date:T", y=alt.Y("mvrv_ratio", title="MVRV Ratio"))
-                .properties(height=320)
-            )
-            st.altair_chart(mvrv_chart, use_container_width=True)
-            latest = mvrv.iloc[-1]
+            st.vega_lite_chart(mvrv, build_mvrv_spec(), use_container_width=True)
+            last_mvrv = float(mvrv["mvrv_ratio"].values[-1])
+            last_mkt = float(mvrv["cap_market_usd"].values[-1])
+            last_real = float(mvrv["cap_realized_usd"].values[-1])
             st.write(
-                f"- 最新 MVRV 为 **{latest['mvrv_ratio']:.2f}**，市场价值 / 实现价值 = {latest['cap_market_usd'] / latest['cap_realized_usd']:.2f}"
+                f"- 最新 MVRV 为 **{last_mvrv:.2f}**，市场价值 / 实现价值 = {last_mkt / last_real:.2f}"
             )
 
     with col2:
@@ -156,13 +299,7 @@ def render_btc_valuations():
         except DataFetchError as exc:
             st.error(f"无法获取 AHR999 指标：{exc}")
         else:
-            base = alt.Chart(ahr).mark_line(color="#fd625e").encode(x="date:T", y="ahr:Q")
-            lines = (
-                base
-                + alt.Chart(pd.DataFrame({"value": [0.45]})).mark_rule(color="#2ab57d", strokeDash=[4, 4]).encode(y="value")
-                + alt.Chart(pd.DataFrame({"value": [1.2]})).mark_rule(color="#5156be", strokeDash=[4, 4]).encode(y="value")
-            )
-            st.altair_chart(lines.properties(height=320), use_container_width=True)
+            st.vega_lite_chart(ahr, build_ahr_spec(), use_container_width=True)
             st.write("- AHR999 < 0.45 常被视为抄底区间；0.45-1.2 适合定投；超过 1.2 需谨慎。")
 
     st.caption("MVRV 数据来自 CoinMetrics；AHR999 指标来自 菜籽数据。")
@@ -178,13 +315,7 @@ def render_etf_flows():
         except DataFetchError as exc:
             st.error(f"无法获取 BTC ETF 数据：{exc}")
         else:
-            chart = (
-                alt.Chart(btc_flows)
-                .mark_bar(color="#fd625e")
-                .encode(x="date:T", y=alt.Y("total_flow", title="净流入 (百万美元)"))
-                .properties(height=320)
-            )
-            st.altair_chart(chart, use_container_width=True)
+            st.vega_lite_chart(btc_flows, build_etf_flow_spec("#fd625e"), use_container_width=True)
             st.dataframe(btc_flows.sort_values("date", ascending=False).head(10), use_container_width=True)
             st.caption("数据来源：Farside Investors，净流入按每日美元口径统计。")
 
@@ -194,13 +325,7 @@ def render_etf_flows():
         except DataFetchError as exc:
             st.error(f"无法获取 ETH ETF 数据：{exc}")
         else:
-            chart = (
-                alt.Chart(eth_flows)
-                .mark_bar(color="#2ab57d")
-                .encode(x="date:T", y=alt.Y("total_flow", title="净流入 (百万美元)"))
-                .properties(height=320)
-            )
-            st.altair_chart(chart, use_container_width=True)
+            st.vega_lite_chart(eth_flows, build_etf_flow_spec("#2ab57d"), use_container_width=True)
             st.dataframe(eth_flows.sort_values("date", ascending=False).head(10), use_container_width=True)
             st.caption("数据来源：Farside Investors，净流入按每日美元口径统计。")
 
@@ -243,6 +368,7 @@ def render_treasury_tables():
             st.caption("数据来源：CoinGecko Treasuries 页面。")
 
 
+prefetch_all()
 render_global_m2()
 st.divider()
 render_market_caps()
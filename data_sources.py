@@ -1,14 +1,24 @@
 """Data retrieval utilities for the crypto research dashboard."""
 from __future__ import annotations
 
+import csv
 import datetime as dt
 import math
 import re
 from dataclasses import dataclass
-from typing import Dict, Iterable, List, Optional, Tuple
+from io import BytesIO
+from typing import Dict, Iterable, List, Optional
 
+import numpy as np
 import pandas as pd
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:  # optional: considerably faster decoding of the large CoinMetrics payloads
+    import orjson
+except ImportError:  # fall back to the stdlib decoder via requests
+    orjson = None
 
 USER_AGENT = (
     "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 "
@@ -17,6 +27,29 @@ USER_AGENT = (
 
 HEADERS = {"User-Agent": USER_AGENT}
 
+# Shared session so repeated calls (and concurrent prefetches) reuse
+# keep-alive TCP/TLS connections instead of reconnecting per request.
+# Only transient gateway errors (common behind r.jina.ai) are retried with
+# backoff; connect/read failures and timeouts fail fast as before, and the final
+# gateway response is still returned so callers raise DataFetchError.
+SESSION = requests.Session()
+SESSION.mount(
+    "https://",
+    HTTPAdapter(
+        pool_connections=16,
+        pool_maxsize=16,
+        max_retries=Retry(
+            total=3,
+            connect=0,
+            read=False,
+            status=3,
+            backoff_factor=0.5,
+            status_forcelist=[502, 503, 504],
+            raise_on_status=False,
+        ),
+    ),
+)
+
 
 class DataFetchError(RuntimeError):
     """Raised when a remote data source cannot be retrieved."""
@@ -44,23 +77,31 @@ class MarketCapSnapshot:
 
 TOTAL_ABOVE_GROUND_GOLD_TONNES = 205_000  # conservative estimate
 TONNES_TO_TROY_OZ = 32_150.7466
+COINMETRICS_MAX_PAGE_SIZE = 10_000  # community API v4 limit
 
 
 def _request_json(url: str, *, headers: Optional[Dict[str, str]] = None) -> dict:
-    resp = requests.get(url, headers=headers or HEADERS, timeout=30)
+    resp = SESSION.get(url, headers=headers or HEADERS, timeout=30)
     if resp.status_code != 200:
         raise DataFetchError(f"Failed to fetch {url} (status {resp.status_code})")
     try:
+        if orjson is not None:
+            return orjson.loads(resp.content)
         return resp.json()
     except ValueError as exc:
         raise DataFetchError(f"Invalid JSON payload from {url}") from exc
 
 
-def _get_text(url: str, *, headers: Optional[Dict[str, str]] = None) -> str:
-    resp = requests.get(url, headers=headers or HEADERS, timeout=30)
+def _get_bytes(url: str, *, headers: Optional[Dict[str, str]] = None) -> bytes:
+    resp = SESSION.get(url, headers=headers or HEADERS, timeout=30)
     if resp.status_code != 200:
         raise DataFetchError(f"Failed to fetch {url} (status {resp.status_code})")
-    return resp.text
+    return resp.content
+
+
+def _get_text(url: str, *, headers: Optional[Dict[str, str]] = None) -> str:
+    # Decode directly rather than via resp.text, which may run charset detection.
+    return _get_bytes(url, headers=headers).decode("utf-8", errors="replace")
 
 
 def fetch_global_m2() -> pd.DataFrame:
@@ -86,7 +127,8 @@ def fetch_global_m2() -> pd.DataFrame:
     if df.empty:
         raise DataFetchError("World Bank M2 dataset returned no usable data")
     df.sort_values("year", inplace=True)
-    df["value_trillion"] = df["value"] / 1e12
+    df["year"] = df["year"].astype("int16")
+    df["value_trillion"] = (df["value"] / 1e12).astype("float32")
     return df
 
 
@@ -119,21 +161,26 @@ def fetch_market_caps() -> MarketCapSnapshot:
     )
 
 
-def _paginate_coinmetrics(base_url: str) -> Iterable[dict]:
+def _paginate_coinmetrics(base_url: str) -> Iterable[List[dict]]:
     next_token: Optional[str] = None
     while True:
         url = base_url
         if next_token:
             url += f"&next_page_token={next_token}"
         payload = _request_json(url)
-        data = payload.get("data", [])
-        for row in data:
-            yield row
+        yield payload.get("data", [])
         next_token = payload.get("next_page_token")
         if not next_token:
             break
 
 
+_MVRV_COLUMNS = {
+    "CapMrktCurUSD": "cap_market_usd",
+    "CapRealUSD": "cap_realized_usd",
+    "CapMVRVCur": "mvrv_ratio",
+}
+
+
 def fetch_mvrv_timeseries(start: dt.date) -> pd.DataFrame:
     """Fetch daily MVRV ratio, market cap and realised cap from CoinMetrics."""
     today = dt.date.today()
@@ -141,64 +188,46 @@ def fetch_mvrv_timeseries(start: dt.date) -> pd.DataFrame:
         "https://community-api.coinmetrics.io/v4/timeseries/asset-metrics"
         "?assets=btc&metrics=CapMrktCurUSD,CapRealUSD,CapMVRVCur"
         f"&frequency=1d&start_time={start.isoformat()}&end_time={today.isoformat()}"
+        f"&page_size={COINMETRICS_MAX_PAGE_SIZE}"
     )
-    rows: List[Dict[str, object]] = []
-    for row in _paginate_coinmetrics(base_url):
-        try:
-            timestamp = dt.datetime.fromisoformat(row["time"].replace("Z", "+00:00"))
-        except (KeyError, ValueError) as exc:
-            raise DataFetchError("Invalid timestamp in CoinMetrics payload") from exc
-        rows.append(
-            {
-                "date": timestamp.date(),
-                "cap_market_usd": float(row["CapMrktCurUSD"]),
-                "cap_realized_usd": float(row["CapRealUSD"]),
-                "mvrv_ratio": float(row["CapMVRVCur"]),
-            }
-        )
-    df = pd.DataFrame(rows)
-    if df.empty:
+    pages = [pd.DataFrame(page) for page in _paginate_coinmetrics(base_url) if page]
+    raw_df = pd.concat(pages, ignore_index=True) if pages else pd.DataFrame()
+    if raw_df.empty:
         raise DataFetchError("CoinMetrics returned no data for MVRV")
+    try:
+        dates = pd.to_datetime(raw_df["time"], utc=True, format="ISO8601").dt.date
+    except (KeyError, ValueError) as exc:
+        raise DataFetchError("Invalid timestamp in CoinMetrics payload") from exc
+    df = raw_df[list(_MVRV_COLUMNS)].astype("float32").rename(columns=_MVRV_COLUMNS)
+    df.insert(0, "date", dates)
     df.sort_values("date", inplace=True)
     return df
 
 
+# The data and labels blocks follow the series name in either order, so both
+# are captured with lookaheads anchored on the name.
+_AHR_RE = re.compile(
+    r'name:\\"AHR999'
+    r"(?=.*?data:\[(?P<data>[^\]]*)\])"
+    r"(?=.*?labels:\[(?P<labels>[^\]]*)\])",
+    re.S,
+)
+
+
 def fetch_ahr_timeseries() -> pd.DataFrame:
     """Scrape the AHR999 indicator from CaiZi."""
     url = "https://www.caizi.fun/trade/data/ahr"
     html = _get_text(url)
-    anchor = 'name:\\"AHR999'
-    anchor_idx = html.find(anchor)
-    if anchor_idx == -1:
+    match = _AHR_RE.search(html)
+    if match is None:
         raise DataFetchError("Unable to locate AHR999 series in CaiZi page")
 
-    data_key = "data:["
-    labels_key = "labels:["
-
-    data_start = html.find(data_key, anchor_idx)
-    labels_start = html.find(labels_key, anchor_idx)
-    if data_start == -1 or labels_start == -1:
-        raise DataFetchError("Missing data or labels block for AHR999")
-
-    data_end = html.find(']', data_start)
-    labels_end = html.find(']', labels_start)
-    if data_end == -1 or labels_end == -1:
-        raise DataFetchError("Malformed AHR999 script section")
-
-    raw_values = [
-        v.strip()
-        for v in html[data_start + len(data_key) : data_end].split(',')
-        if v.strip()
-    ]
-    raw_labels = [
-        label.strip().strip('"')
-        for label in html[labels_start + len(labels_key) : labels_end].split(',')
-        if label.strip()
-    ]
-    if len(raw_values) != len(raw_labels):
+    values = np.fromstring(match["data"], sep=",", dtype=np.float64)
+    labels = [label.strip() for label in match["labels"].replace('"', "").split(",")]
+    labels = [label for label in labels if label]
+    if len(values) != len(labels):
         raise DataFetchError("Mismatched label/value counts in AHR data")
-    dates = pd.to_datetime(raw_labels, format="%Y-%m-%d", errors="coerce")
-    values = [float(v) for v in raw_values]
+    dates = pd.to_datetime(labels, format="%Y-%m-%d", errors="coerce")
     df = pd.DataFrame({"date": dates, "ahr": values})
     df.dropna(inplace=True)
     df.sort_values("date", inplace=True)
@@ -209,29 +238,60 @@ def _proxied_farside_url(path: str) -> str:
     return f"https://r.jina.ai/https://farside.co.uk/{path.strip('/')}/"
 
 
+def _markdown_cells(content: bytes) -> pd.DataFrame:
+    """Split every ``|``-prefixed line of ``content`` into a frame of stripped cells.
+
+    Columns are positional (``0..n``); rows shorter than the widest row are
+    padded with ``NaN`` so genuine empty cells stay distinguishable as ``""``.
+    The raw bytes go straight to the C parser, which decodes them itself.
+    """
+    lines = [line.strip(b"|") for line in content.splitlines() if line.startswith(b"|")]
+    lines = [line for line in lines if line.strip()]
+    if not lines:
+        return pd.DataFrame()
+    n_parts = np.fromiter((line.count(b"|") + 1 for line in lines), dtype=np.int64, count=len(lines))
+    width = int(n_parts.max())
+    cells = pd.read_csv(
+        BytesIO(b"\n".join(lines)),
+        sep="|",
+        header=None,
+        names=range(width),
+        dtype=str,
+        engine="c",
+        encoding="utf-8",
+        encoding_errors="replace",
+        quoting=csv.QUOTE_NONE,
+        skipinitialspace=True,
+        keep_default_na=False,
+    )
+    cells = cells.apply(lambda column: column.str.strip())
+    return cells.where(np.arange(width) < n_parts[:, None])
+
+
+def _markdown_rows(content: bytes, width: int) -> pd.DataFrame:
+    """Return the first ``width`` cells of every table row with at least ``width`` cells."""
+    cells = _markdown_cells(content)
+    if cells.shape[1] < width:
+        return pd.DataFrame(columns=range(width), dtype=object)
+    return cells.loc[cells[width - 1].notna(), list(range(width))].reset_index(drop=True)
+
+
+# One pass over the whole dump: the date cell and the last (total) cell of
+# every daily row in the Farside flow table.
+_FARSIDE_ROW_RE = re.compile(
+    r"^\|[ \t]*(\d{2} [A-Za-z]{3} \d{4})[ \t]*\|(?:.*\|)?([^|\n]*)\|[ \t\r]*$",
+    re.M,
+)
+
+
 def _parse_farside_daily_flows(text: str) -> pd.DataFrame:
-    rows: List[Tuple[str, float]] = []
-    date_pattern = re.compile(r"^\|\s*(\d{2} [A-Za-z]{3} \d{4})\s*\|")
-    for line in text.splitlines():
-        if not line.strip().startswith('|'):
-            continue
-        match = date_pattern.match(line)
-        if not match:
-            continue
-        date_str = match.group(1)
-        parts = [p.strip() for p in line.strip('|').split('|')]
-        if not parts:
-            continue
-        total_str = parts[-1]
-        value = _to_number(total_str)
-        rows.append((date_str, value))
-    df = pd.DataFrame(rows, columns=["date_str", "total_flow"])
+    df = pd.DataFrame(_FARSIDE_ROW_RE.findall(text), columns=["date_str", "total_flow"])
     if df.empty:
         raise DataFetchError("No daily ETF flow rows found in Farside table")
     df["date"] = pd.to_datetime(df["date_str"], format="%d %b %Y", errors="coerce")
     df.dropna(subset=["date"], inplace=True)
     df.sort_values("date", inplace=True)
-    df["total_flow"] = df["total_flow"].astype(float)
+    df["total_flow"] = _to_numbers(df["total_flow"]).astype("float32")
     return df
 
 
@@ -245,46 +305,30 @@ def fetch_eth_etf_flows() -> pd.DataFrame:
     return _parse_farside_daily_flows(text)
 
 
-def _to_number(value: str) -> float:
-    value = value.strip()
-    if not value or value == '-':
-        return float("nan")
-    negative = value.startswith('(') and value.endswith(')')
-    cleaned = value.strip('()').replace(',', '').replace('$', '')
-    cleaned = cleaned.replace('+', '').replace('SOL', '').replace('ETH', '').replace('BTC', '')
-    cleaned = cleaned.replace('%', '')
-    multipliers = {"m": 1e6, "b": 1e9}
-    suffix = cleaned[-1].lower() if cleaned[-1].lower() in multipliers else ''
-    if suffix:
-        cleaned_num = cleaned[:-1]
-    else:
-        cleaned_num = cleaned
-    try:
-        number = float(cleaned_num)
-    except ValueError:
-        return float("nan")
-    if suffix:
-        number *= multipliers[suffix]
-    if negative:
-        number = -number
-    return number
+_CLEAN_RE = re.compile(r"[,$+%()]|SOL|ETH|BTC")
+_SUFFIX_MULTIPLIERS = {"m": 1e6, "b": 1e9}
+
+
+def _to_numbers(values: pd.Series) -> pd.Series:
+    """Parse a column of table cells such as ``"(1,234)"`` or ``"$1.5b"`` into floats."""
+    values = values.astype(str).str.strip()
+    negative = values.str.startswith("(") & values.str.endswith(")")
+    cleaned = values.str.replace(_CLEAN_RE, "", regex=True).str.strip()
+    multiplier = cleaned.str[-1:].str.lower().map(_SUFFIX_MULTIPLIERS)
+    has_suffix = multiplier.notna()
+    cleaned = cleaned.where(~has_suffix, cleaned.str[:-1])
+    numbers = pd.to_numeric(cleaned, errors="coerce") * multiplier.fillna(1.0)
+    return numbers.where(~negative, -numbers).astype(float)
 
 
 def fetch_btc_treasury_holdings(top_n: int = 15) -> pd.DataFrame:
-    text = _get_text(_proxied_farside_url("bitcoin-treasury-companies"))
-    rows: List[List[str]] = []
-    for line in text.splitlines():
-        if not line.startswith('|'):
-            continue
-        parts = [p.strip() for p in line.strip('|').split('|')]
-        if len(parts) < 9 or parts[0] in {"Ticker", ""}:
-            continue
-        rows.append(parts[:9])
-    if not rows:
+    content = _get_bytes(_proxied_farside_url("bitcoin-treasury-companies"))
+    rows = _markdown_rows(content, 9)
+    rows = rows[~rows[0].isin({"Ticker", ""})]
+    if rows.empty:
         raise DataFetchError("No BTC treasury rows parsed")
-    df = pd.DataFrame(
-        rows,
-        columns=[
+    df = rows.set_axis(
+        [
             "Ticker",
             "Name",
             "Type",
@@ -295,27 +339,20 @@ def fetch_btc_treasury_holdings(top_n: int = 15) -> pd.DataFrame:
             "Market Cap (m)",
             "BTC Holdings",
         ],
+        axis=1,
     )
-    df["BTC Holdings"] = df["BTC Holdings"].apply(_to_number)
-    df.sort_values("BTC Holdings", ascending=False, inplace=True)
-    return df.head(top_n)
+    df["BTC Holdings"] = _to_numbers(df["BTC Holdings"])
+    return df.nlargest(top_n, "BTC Holdings")
 
 
 def fetch_eth_treasury_holdings(top_n: int = 15) -> pd.DataFrame:
-    text = _get_text("https://r.jina.ai/https://ethereumtreasuries.net/")
-    rows: List[List[str]] = []
-    for line in text.splitlines():
-        if not line.startswith('|'):
-            continue
-        parts = [p.strip() for p in line.strip('|').split('|')]
-        if len(parts) < 8 or parts[0] == "Company Name":
-            continue
-        rows.append(parts[:8])
-    if not rows:
+    content = _get_bytes("https://r.jina.ai/https://ethereumtreasuries.net/")
+    rows = _markdown_rows(content, 8)
+    rows = rows[rows[0] != "Company Name"]
+    if rows.empty:
         raise DataFetchError("No Ethereum treasury data parsed")
-    df = pd.DataFrame(
-        rows,
-        columns=[
+    df = rows.set_axis(
+        [
             "Company",
             "Ticker",
             "Flag",
@@ -325,32 +362,26 @@ def fetch_eth_treasury_holdings(top_n: int = 15) -> pd.DataFrame:
             "Chart",
             "Description",
         ],
+        axis=1,
     )
-    df["ETH Held"] = df["ETH Held"].apply(_to_number)
-    df.sort_values("ETH Held", ascending=False, inplace=True)
-    return df.head(top_n)
+    df["ETH Held"] = _to_numbers(df["ETH Held"])
+    return df.nlargest(top_n, "ETH Held")
 
 
 def fetch_sol_treasury_holdings(top_n: int = 15) -> pd.DataFrame:
-    text = _get_text("https://r.jina.ai/https://www.coingecko.com/en/treasuries/solana")
-    rows: List[List[str]] = []
-    for line in text.splitlines():
-        if not line.startswith('|'):
-            continue
-        parts = [p.strip() for p in line.strip('|').split('|')]
-        if len(parts) < 8 or parts[0] == "Company":
-            continue
-        # Some rows include rank numbers at index 0
-        if parts[0].isdigit():
-            parts = parts[1:]
-        if len(parts) < 7:
-            continue
-        rows.append(parts[:7])
-    if not rows:
+    content = _get_bytes("https://r.jina.ai/https://www.coingecko.com/en/treasuries/solana")
+    rows = _markdown_rows(content, 8)
+    rows = rows[rows[0] != "Company"]
+    if rows.empty:
         raise DataFetchError("No Solana treasury table detected")
-    df = pd.DataFrame(
-        rows,
-        columns=[
+    # Some rows include rank numbers at index 0
+    ranked = rows[0].str.isdigit().to_numpy()[:, None]
+    rows = pd.DataFrame(
+        np.where(ranked, rows.iloc[:, 1:8].to_numpy(), rows.iloc[:, :7].to_numpy()),
+        index=rows.index,
+    )
+    df = rows.set_axis(
+        [
             "Company",
             "Type",
             "Change",
@@ -359,10 +390,10 @@ def fetch_sol_treasury_holdings(top_n: int = 15) -> pd.DataFrame:
             "Share of Supply",
             "Links",
         ],
+        axis=1,
     )
-    df["SOL Held"] = df["SOL Held"].apply(_to_number)
-    df.sort_values("SOL Held", ascending=False, inplace=True)
-    return df.head(top_n)
+    df["SOL Held"] = _to_numbers(df["SOL Held"])
+    return df.nlargest(top_n, "SOL Held")
 
 
 __all__ = [